@@ -1,19 +1,18 @@
-from flask import Flask
+from aiohttp import web
 from threading import Thread
-import logging
+import asyncio
 
-# Disable Flask's default logger
-log = logging.getLogger('werkzeug')
-log.setLevel(logging.ERROR)
+app = web.Application()
 
-app = Flask('')
+async def home(request):
+    return web.Response(text="I'm alive")
 
-@app.route('/')
-def home():
-    return "I'm alive"
+app.router.add_get('/', home)
 
 def run():
-    app.run(host='0.0.0.0', port=3000, threaded=True)
+    # Runs in a background thread, so it gets its own event loop and leaves signals to the main thread
+    web.run_app(app, host='0.0.0.0', port=3000, access_log=None, print=None,
+                handle_signals=False, loop=asyncio.new_event_loop())
 
 def keep_alive():
     t = Thread(target=run)
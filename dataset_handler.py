@@ -1,7 +1,11 @@
 # dataset_handler.py
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
 import os
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(
@@ -10,13 +14,133 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def process_dataset(input_file='imdb_movies.csv', output_file='movies_data.csv'):
+# Columns every movie must have a value in
+REQUIRED_COLUMNS = ['Name', 'Genre']
+
+# Columns of the original dataset used by the bot, with their types.
+# Declaring them up front skips type inference and unused columns when reading.
+MOVIE_DTYPES = {
+    'Name': 'string',
+    'Date': 'string',
+    'Rate': 'string',
+    'Genre': 'string',
+    'Duration': 'string',
+    'Type': 'category',
+    'Certificate': 'category',
+    'Violence': 'category',
+    'Frightening': 'category',
+    'Profanity': 'category',
+}
+
+# Parquet types of the processed columns, so every chunk is written with the same schema
+# even when a column happens to be all missing in the first chunk
+PARQUET_TYPES = {
+    'string': pa.string(),
+    'float64': pa.float64(),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+}
+PROCESSED_PARQUET_TYPES = {
+    'Rate': pa.float32(),
+    'Duration': pa.float64(),
+    'Plot': pa.string(),
+}
+
+def _parquet_schema(columns):
+    """
+    Build the Parquet schema for the processed dataset.
+    
+    Args:
+        columns (list): Processed column names, in order
+    
+    Returns:
+        Schema: Parquet schema with one field per column
+    """
+    return pa.schema([
+        (column, PROCESSED_PARQUET_TYPES.get(column) or PARQUET_TYPES[MOVIE_DTYPES[column]])
+        for column in columns
+    ])
+
+def read_movies_csv(file_path, chunksize=None):
+    """
+    Read the original dataset, keeping only the columns listed in MOVIE_DTYPES.
+    
+    Args:
+        file_path (str): Path to the original dataset
+        chunksize (int): If given, read the file in chunks of this many rows
+    
+    Returns:
+        DataFrame, or an iterator of DataFrames when chunksize is given
+    """
+    return pd.read_csv(file_path, usecols=lambda column: column in MOVIE_DTYPES, dtype=MOVIE_DTYPES,
+                       chunksize=chunksize)
+
+def _content_warning(df, column):
+    """
+    Build the "<column>: <value>" text for a content warning column.
+    
+    Args:
+        df (DataFrame): Original dataset
+        column (str): Name of the content warning column
+    
+    Returns:
+        Series: Warning text per row, empty where the value is missing
+    """
+    if column not in df.columns:
+        return pd.Series('', index=df.index)
+    
+    values = df[column]
+    return (column + ': ' + values.astype(str)).where(values.notna(), '')
+
+def _process_chunk(df):
+    """
+    Clean a chunk of the original dataset for the bot, keeping the original column names.
+    
+    Args:
+        df (DataFrame): Chunk of the original dataset
+    
+    Returns:
+        DataFrame: Processed rows of the chunk
+    """
+    # Make sure the required columns exist
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    
+    # Clean data - keep rows with essential information
+    processed_df = df.dropna(subset=REQUIRED_COLUMNS).copy()
+    
+    # Store Rate as numbers so loading the cache needs no cleanup ("No Rate" becomes NaN)
+    if 'Rate' in processed_df.columns:
+        processed_df['Rate'] = pd.to_numeric(processed_df['Rate'], errors='coerce').astype('float32')
+    else:
+        logger.warning("'Rate' column not found. Adding placeholder.")
+        processed_df['Rate'] = np.float32(np.nan)
+    
+    # Durations are read as text so a stray non-numeric value becomes NaN instead of failing the read
+    if 'Duration' in processed_df.columns:
+        processed_df['Duration'] = pd.to_numeric(processed_df['Duration'], errors='coerce').astype('float64')
+    
+    # Add content details
+    if 'Duration' in processed_df.columns and 'Certificate' in processed_df.columns:
+        processed_df['Plot'] = (
+            processed_df['Type'].astype(str) + ' ' + processed_df['Certificate'].astype(str) + ' rated, ' +
+            processed_df['Duration'].astype(str) + ' duration. ' +
+            'Content warnings: ' +
+            _content_warning(processed_df, 'Violence') + ' ' +
+            _content_warning(processed_df, 'Frightening')
+        )
+    
+    return processed_df
+
+def process_dataset(input_file='imdb_movies.csv', output_file='movies_data.parquet', chunksize=100_000):
     """
     Process the dataset with the specified column structure.
+    The input is streamed in chunks, so memory use doesn't grow with the file size.
     
     Args:
         input_file (str): Path to the original dataset
         output_file (str): Path to save the processed dataset
+        chunksize (int): Number of rows processed at a time
     
     Returns:
         bool: True if successful, False otherwise
@@ -24,41 +148,46 @@ def process_dataset(input_file='imdb_movies.csv', output_file='movies_data.csv')
     try:
         logger.info(f"Processing dataset from {input_file}")
         
-        # Load the dataset
-        df = pd.read_csv(input_file)
-        
-        # Print all columns to verify structure
-        logger.info(f"Dataset loaded with columns: {', '.join(df.columns)}")
-        
-        # Create a new DataFrame with properly mapped columns
-        processed_df = pd.DataFrame()
-        
-        # Map the columns - IMPORTANT: preserve the original column names
-        processed_df['Title'] = df['Name'] if 'Name' in df.columns else "Unknown"
-        processed_df['Year'] = df['Date'] if 'Date' in df.columns else "Unknown"
-        # Keep the original column name for Rating!
-        processed_df['Rate'] = df['Rate'] if 'Rate' in df.columns else 0
-        processed_df['Genre'] = df['Genre'] if 'Genre' in df.columns else "Unknown"
-        processed_df['Type'] = df['Type'] if 'Type' in df.columns else "Unknown"
-        
-        # Add content details
-        if 'Duration' in df.columns and 'Certificate' in df.columns:
-            processed_df['Plot'] = df.apply(
-                lambda row: f"{row['Type']} {row['Certificate']} rated, {row['Duration']} duration. " + 
-                        f"Content warnings: " +
-                        f"{'Violence: ' + str(row['Violence']) if 'Violence' in df.columns and pd.notna(row['Violence']) else ''} " +
-                        f"{'Frightening: ' + str(row['Frightening']) if 'Frightening' in df.columns and pd.notna(row['Frightening']) else ''}",
-                axis=1
-            )
+        # Write to a temporary file so a failed run never leaves a partial dataset behind
+        temp_file = f"{output_file}.tmp"
+        writer = None
+        total_items = 0
         
-        # Clean data - keep rows with essential information
-        processed_df = processed_df.dropna(subset=['Title', 'Rate', 'Genre'])
+        try:
+            try:
+                with read_movies_csv(input_file, chunksize=chunksize) as reader:
+                    for i, df in enumerate(reader):
+                        if i == 0:
+                            # Print all columns to verify structure
+                            logger.info(f"Dataset loaded with columns: {', '.join(df.columns)}")
+                        
+                        processed_df = _process_chunk(df)
+                        
+                        if writer is None:
+                            logger.info(f"Saving processed dataset to {output_file}")
+                            schema = _parquet_schema(processed_df.columns)
+                            writer = pq.ParquetWriter(temp_file, schema, compression='zstd')
+                        
+                        # Every chunk is converted to the same fixed schema
+                        table = pa.Table.from_pandas(processed_df, schema=writer.schema, preserve_index=False)
+                        writer.write_table(table)
+                        total_items += len(processed_df)
+            finally:
+                # Closing the writer finishes the file, so it must happen before it's moved into place
+                if writer is not None:
+                    writer.close()
+            
+            if writer is None:
+                logger.error(f"No rows found in {input_file}")
+                return False
+            
+            os.replace(temp_file, output_file)
+        finally:
+            # Remove the partial file if it wasn't moved into place
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
         
-        # Save processed dataset
-        logger.info(f"Saving processed dataset to {output_file}")
-        processed_df.to_csv(output_file, index=False)
-        
-        logger.info(f"Dataset processed successfully. Total items: {len(processed_df)}")
+        logger.info(f"Dataset processed successfully. Total items: {total_items}")
         return True
         
     except Exception as e:
@@ -67,41 +196,45 @@ def process_dataset(input_file='imdb_movies.csv', output_file='movies_data.csv')
         logger.error(traceback.format_exc())
         return False
 
+@lru_cache(maxsize=1)
 def load_movies_data():
     """
     Load and prepare the movie dataset for the bot.
+    The result is cached, so the dataset is only read once per process.
     
     Returns:
         tuple: (DataFrame of movies, list of available genres)
     """
     try:
-        # Check if the processed dataset exists
-        if os.path.exists('movies_data.csv'):
+        processed_file = 'movies_data.parquet'
+        # Prefer the original dataset, falling back to the older CSV export of it
+        source_file = 'imdb_movies.csv' if os.path.exists('imdb_movies.csv') else 'movies_data.csv'
+        
+        # Check if an up-to-date processed dataset exists
+        if os.path.exists(processed_file) and (
+                not os.path.exists(source_file) or
+                os.path.getmtime(processed_file) >= os.path.getmtime(source_file)):
             logger.info("Loading existing processed dataset")
-            df = pd.read_csv('movies_data.csv')
-        else:
-            # Check if the original dataset exists
-            if os.path.exists('imdb_movies.csv'):
-                logger.info("Processing original dataset")
-                success = process_dataset()
-                if not success:
-                    logger.error("Failed to process the dataset")
-                    return pd.DataFrame(), []
-                df = pd.read_csv('movies_data.csv')
-            else:
-                logger.error("No dataset file found")
+        elif os.path.exists(source_file):
+            logger.info(f"Processing original dataset from {source_file}")
+            success = process_dataset(source_file, processed_file)
+            if not success:
+                logger.error("Failed to process the dataset")
                 return pd.DataFrame(), []
+        else:
+            logger.error("No dataset file found")
+            return pd.DataFrame(), []
+        
+        df = pd.read_parquet(processed_file)
         
         # Log all column names to ensure they match what we expect
         logger.info(f"Loaded dataset with columns: {', '.join(df.columns)}")
         
         # Extract genres
-        all_genres = []
-        for genres in df['Genre'].str.split(','):
-            if isinstance(genres, list):
-                all_genres.extend([g.strip() for g in genres])
+        all_genres = df['Genre'].dropna().str.split(',').explode().str.strip()
+        all_genres = all_genres[all_genres != '']
         
-        unique_genres = sorted(list(set([g for g in all_genres if g])))
+        unique_genres = sorted(all_genres.unique().tolist())
         
         logger.info(f"Dataset loaded successfully with {len(df)} items and {len(unique_genres)} genres")
         return df, unique_genres
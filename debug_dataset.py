@@ -54,22 +54,17 @@ def debug_dataset(filename='imdb_movies.csv'):
         
         # If there's a 'Genre' column, analyze the genres
         if 'Genre' in df.columns:
-            all_genres = []
-            for genres in df['Genre'].str.split(','):
-                if isinstance(genres, list):
-                    all_genres.extend([g.strip() for g in genres])
+            all_genres = df['Genre'].dropna().str.split(',').explode().str.strip()
+            all_genres = all_genres[all_genres != '']
             
-            unique_genres = sorted(list(set([g for g in all_genres if g])))
+            unique_genres = sorted(all_genres.unique().tolist())
             logger.info(f"Unique genres found: {', '.join(unique_genres)}")
             
             # Count genre occurrences
-            from collections import Counter
-            genre_counts = Counter(all_genres)
-            top_genres = genre_counts.most_common(10)
+            top_genres = all_genres.value_counts().head(10)
             logger.info("Top 10 genres by frequency:")
-            for genre, count in top_genres:
-                if genre:  # Only print non-empty genres
-                    logger.info(f"  {genre}: {count}")
+            for genre, count in top_genres.items():
+                logger.info(f"  {genre}: {count}")
         
     except Exception as e:
         logger.error(f"Error debugging dataset: {e}")
@@ -1,10 +1,10 @@
-import os
+import asyncio
 import logging
-import random
 import pandas as pd
 import numpy as np
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, ConversationHandler
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, ConversationHandler, MessageHandler, filters
+from dataset_handler import load_movies_data
 
 # Set up logging
 logging.basicConfig(
@@ -16,64 +16,75 @@ logger = logging.getLogger(__name__)
 # States for conversation
 CHOOSING_GENRE = 0
 
-def load_movies_data():
+def build_genre_index(df):
     """
-    Load movie data directly using original column names from the dataset
+    Map each lowercased genre to the row positions of the movies in that genre
     """
-    try:
-        # Load the dataset
-        file_path = 'imdb_movies.csv'
-        if not os.path.exists(file_path):
-            logger.error(f"Dataset file not found: {file_path}")
-            return pd.DataFrame(), []
-            
-        df = pd.read_csv(file_path)
-        
-        # Log column names
-        logger.info(f"Dataset loaded with columns: {', '.join(df.columns)}")
-        
-        # Make sure the required columns exist
-        required_columns = ['Name', 'Genre']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            logger.error(f"Missing required columns: {', '.join(missing_columns)}")
-            return pd.DataFrame(), []
-        
-        # Clean up data - remove rows with missing values in key columns
-        df = df.dropna(subset=required_columns)
-        
-        # Process Rate column - handle "No Rate" values
-        if 'Rate' in df.columns:
-            # Replace "No Rate" with NaN
-            df['Rate'] = df['Rate'].replace("No Rate", np.nan)
-            
-            # Convert to numeric and handle errors
-            df['Rate'] = pd.to_numeric(df['Rate'], errors='coerce')
-            logger.info(f"Processed Rate column. Sample values: {df['Rate'].head()}")
-        else:
-            logger.warning("'Rate' column not found. Adding placeholder.")
-            df['Rate'] = np.nan
-        
-        # Extract genres from the Genre column
-        all_genres = []
-        for genres in df['Genre'].str.split(','):
-            if isinstance(genres, list):
-                all_genres.extend([g.strip() for g in genres])
-        
-        unique_genres = sorted(list(set([g for g in all_genres if g])))
-        logger.info(f"Loaded {len(df)} movies with {len(unique_genres)} unique genres")
-        
-        return df, unique_genres
-        
-    except Exception as e:
-        logger.error(f"Error loading dataset: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        return pd.DataFrame(), []
+    if df.empty:
+        return {}
+    
+    genres = df['Genre'].str.split(',').explode().str.strip().str.lower()
+    genres = genres[genres != '']
+    
+    return {genre: np.unique(positions) for genre, positions in genres.groupby(genres).groups.items()}
+
+def build_rated_mask(df):
+    """
+    Mark the movies that have a valid numeric rating > 0
+    """
+    if df.empty:
+        return np.zeros(0, dtype=bool)
+    
+    return (df['Rate'].notna() & (df['Rate'] > 0)).to_numpy()
+
+def build_presence(df, column):
+    """
+    Mark the movies that have a value in the given column (none if the column is missing)
+    """
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    
+    return df[column].notna().to_numpy()
+
+def top_rated(rated_movies, count):
+    """
+    Return the highest rated movies from a frame of rated movies
+    """
+    if rated_movies.empty:
+        return pd.DataFrame()
+    
+    return rated_movies.nlargest(count, 'Rate')
 
 # Load the dataset
 movies_df, available_genres = load_movies_data()
+# Row labels are used as positions into the precomputed arrays below, so make sure they match
+movies_df = movies_df.reset_index(drop=True)
+GENRE_INDEX = build_genre_index(movies_df)
+
+# The dataset doesn't change while the bot runs, so ratings are split and ranked once
+RATED_MASK = build_rated_mask(movies_df)
+RATED_DF = movies_df[RATED_MASK]
+POPULAR_TOP10 = top_rated(RATED_DF, 10)
+TOP_RATED_PER_GENRE = {
+    genre: top_rated(movies_df.iloc[positions[RATED_MASK[positions]]], 5)
+    for genre, positions in GENRE_INDEX.items()
+}
+
+# Optional details, checked per row by position when formatting responses
+HAS_TYPE = build_presence(movies_df, 'Type')
+HAS_CERTIFICATE = build_presence(movies_df, 'Certificate')
+HAS_DURATION = build_presence(movies_df, 'Duration')
+
+# Content warnings shown for random movies, as arrays indexed by position
+WARNING_COLUMNS = ('Violence', 'Frightening', 'Profanity')
+WARNING_PRESENT = {column: build_presence(movies_df, column) for column in WARNING_COLUMNS if column in movies_df.columns}
+WARNING_VALUES = {column: movies_df[column].to_numpy() for column in WARNING_PRESENT}
+
+# Keyboard with genre buttons, 3 buttons per row
+GENRE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(genre, callback_data=f"genre_{genre}") for genre in available_genres[i:i + 3]]
+    for i in range(0, len(available_genres), 3)
+])
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Send a message when the command /start is issued."""
@@ -90,33 +101,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 async def genres_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display all available genres."""
-    if not available_genres:
-        await update.message.reply_text("Sorry, I couldn't load the genres. Please try again later.")
-        return
-    
     genres_text = ", ".join(available_genres)
     await update.message.reply_text(f"Available genres:\n{genres_text}\n\nUse /recommend to get recommendations.")
 
 async def recommend_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start the recommendation process by asking for genre."""
-    if movies_df.empty:
-        await update.message.reply_text("Sorry, I couldn't load the movie database. Please try again later.")
-        return ConversationHandler.END
-    
-    # Create a keyboard with genre buttons
-    keyboard = []
-    row = []
-    
-    for i, genre in enumerate(available_genres):
-        row.append(InlineKeyboardButton(genre, callback_data=f"genre_{genre}"))
-        
-        # Create rows with 3 buttons each
-        if (i + 1) % 3 == 0 or i == len(available_genres) - 1:
-            keyboard.append(row)
-            row = []
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text("Please select a genre:", reply_markup=reply_markup)
+    await update.message.reply_text("Please select a genre:", reply_markup=GENRE_KEYBOARD)
     
     return CHOOSING_GENRE
 
@@ -128,159 +118,125 @@ async def genre_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Extract the genre from callback data
     genre = query.data.split('_')[1]
     
-    # Filter movies by the selected genre
-    filtered_movies = movies_df[movies_df['Genre'].str.contains(genre, case=False, na=False)]
+    # Look up movies of the selected genre in the precomputed index (keys are lowercased)
+    genre_key = genre.lower()
+    positions = GENRE_INDEX.get(genre_key)
     
-    if filtered_movies.empty:
+    if positions is None:
         await query.edit_message_text(f"Sorry, no movies found for the genre '{genre}'.")
         return ConversationHandler.END
     
-    # Safe separation of rated and unrated movies
-    try:
-        # Use only valid numeric ratings > 0
-        rated_movies = filtered_movies[filtered_movies['Rate'].notna() & (filtered_movies['Rate'] > 0)]
-        unrated_movies = filtered_movies[filtered_movies['Rate'].isna() | (filtered_movies['Rate'] <= 0)]
-    except Exception as e:
-        logger.error(f"Error separating rated/unrated movies: {e}")
-        # If there's an error in the filtering, just show all movies without filtering
-        rated_movies = pd.DataFrame()
-        unrated_movies = filtered_movies
+    # Top 5 rated movies are precomputed per genre
+    top_rated_movies = TOP_RATED_PER_GENRE[genre_key]
     
-    # Sort rated movies by Rate and get top 5
-    if not rated_movies.empty:
-        try:
-            top_rated_movies = rated_movies.sort_values(by='Rate', ascending=False).head(5)
-        except Exception as e:
-            logger.error(f"Error sorting rated movies: {e}")
-            top_rated_movies = rated_movies.head(5)
-    else:
-        top_rated_movies = pd.DataFrame()
-        
-    # Get up to 5 unrated movies
-    top_unrated_movies = unrated_movies.head(5)
+    # Get up to 5 unrated movies using the precomputed rated mask
+    top_unrated_movies = movies_df.iloc[positions[~RATED_MASK[positions]][:5]]
     
     # Create a response message
-    response = f"🎬 {genre} Movies Recommendations 🎬\n\n"
+    parts = [f"🎬 {genre} Movies Recommendations 🎬\n\n"]
     
     # Add rated movies section
     if not top_rated_movies.empty:
-        response += "⭐ RATED MOVIES ⭐\n"
-        for i, (_, movie) in enumerate(top_rated_movies.iterrows(), 1):
-            name = movie['Name']
-            date = movie.get('Date', 'N/A')
-            rate = movie.get('Rate', 'N/A')
+        parts.append("⭐ RATED MOVIES ⭐\n")
+        for i, movie in enumerate(top_rated_movies.itertuples(), 1):
+            name = movie.Name
+            date = getattr(movie, 'Date', 'N/A')
+            rate = movie.Rate
             
-            response += f"{i}. {name} ({date})\n"
-            response += f"   Rating: {rate}/10\n"
+            parts.append(f"{i}. {name} ({date})\n")
+            parts.append(f"   Rating: {rate:.1f}/10\n")
             
             # Add additional info if available
-            if 'Certificate' in movie and pd.notna(movie['Certificate']):
-                response += f"   Certificate: {movie['Certificate']}\n"
+            if HAS_CERTIFICATE[movie.Index]:
+                parts.append(f"   Certificate: {movie.Certificate}\n")
             
-            if 'Duration' in movie and pd.notna(movie['Duration']):
-                response += f"   Duration: {movie['Duration']}\n"
+            if HAS_DURATION[movie.Index]:
+                parts.append(f"   Duration: {movie.Duration}\n")
                 
-            response += "\n"
+            parts.append("\n")
     
     # Add unrated movies section
     if not top_unrated_movies.empty:
-        response += "📽️ UNRATED MOVIES 📽️\n"
-        for i, (_, movie) in enumerate(top_unrated_movies.iterrows(), 1):
-            name = movie['Name']
-            date = movie.get('Date', 'N/A')
+        parts.append("📽️ UNRATED MOVIES 📽️\n")
+        for i, movie in enumerate(top_unrated_movies.itertuples(), 1):
+            name = movie.Name
+            date = getattr(movie, 'Date', 'N/A')
             
-            response += f"{i}. {name} ({date})\n"
+            parts.append(f"{i}. {name} ({date})\n")
             
             # Add additional info if available
-            if 'Certificate' in movie and pd.notna(movie['Certificate']):
-                response += f"   Certificate: {movie['Certificate']}\n"
+            if HAS_CERTIFICATE[movie.Index]:
+                parts.append(f"   Certificate: {movie.Certificate}\n")
             
-            if 'Duration' in movie and pd.notna(movie['Duration']):
-                response += f"   Duration: {movie['Duration']}\n"
+            if HAS_DURATION[movie.Index]:
+                parts.append(f"   Duration: {movie.Duration}\n")
                 
-            response += "\n"
+            parts.append("\n")
     
-    response += "Use /recommend to get more recommendations or /genres to see all genres."
+    parts.append("Use /recommend to get more recommendations or /genres to see all genres.")
+    response = "".join(parts)
     
     await query.edit_message_text(response)
     return ConversationHandler.END
 
 async def popular_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show the most popular movies overall."""
-    if movies_df.empty:
-        await update.message.reply_text("Sorry, I couldn't load the movie database. Please try again later.")
+    if POPULAR_TOP10.empty:
+        # No rated movies
+        await update.message.reply_text("No rated movies found in the database.")
         return
     
-    try:
-        # Filter to only include movies with valid numeric ratings > 0
-        rated_movies = movies_df[movies_df['Rate'].notna() & (movies_df['Rate'] > 0)]
-        
-        if not rated_movies.empty:
-            # Sort by Rate
-            top_movies = rated_movies.sort_values(by='Rate', ascending=False).head(10)
-        else:
-            # No rated movies
-            await update.message.reply_text("No rated movies found in the database.")
-            return
-    except Exception as e:
-        logger.error(f"Error processing popular movies: {e}")
-        await update.message.reply_text("An error occurred while processing popular movies.")
-        return
+    parts = ["🏆 Top 10 Most Popular Movies 🏆\n\n"]
     
-    response = "🏆 Top 10 Most Popular Movies 🏆\n\n"
+    for i, movie in enumerate(POPULAR_TOP10.itertuples(index=False), 1):
+        parts.append(f"{i}. {movie.Name} ({getattr(movie, 'Date', 'N/A')})\n")
+        parts.append(f"   Genre: {movie.Genre}\n")
+        parts.append(f"   Rating: {movie.Rate:.1f}/10\n\n")
     
-    for i, (_, movie) in enumerate(top_movies.iterrows(), 1):
-        response += f"{i}. {movie['Name']} ({movie.get('Date', 'N/A')})\n"
-        response += f"   Genre: {movie['Genre']}\n"
-        response += f"   Rating: {movie.get('Rate', 'N/A')}/10\n\n"
+    response = "".join(parts)
     
     await update.message.reply_text(response)
 
 async def random_movie(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Suggest a random movie."""
-    if movies_df.empty:
-        await update.message.reply_text("Sorry, I couldn't load the movie database. Please try again later.")
-        return
-    
-    # Get a random movie
-    random_index = random.randint(0, len(movies_df) - 1)
-    movie = movies_df.iloc[random_index]
+    # Get a random movie as a plain dict, keeping its position for the precomputed arrays
+    sampled = movies_df.sample(n=1)
+    idx = sampled.index[0]
+    movie = sampled.to_dict('records')[0]
     
-    response = "🎲 Random Movie Recommendation 🎲\n\n"
-    response += f"Title: {movie['Name']} ({movie.get('Date', 'N/A')})\n"
-    response += f"Genre: {movie['Genre']}\n"
+    parts = ["🎲 Random Movie Recommendation 🎲\n\n"]
+    parts.append(f"Title: {movie['Name']} ({movie.get('Date', 'N/A')})\n")
+    parts.append(f"Genre: {movie['Genre']}\n")
     
     # Check if movie has valid rating
-    if pd.notna(movie.get('Rate')) and movie.get('Rate') > 0:
-        response += f"Rating: {movie.get('Rate')}/10\n"
+    if RATED_MASK[idx]:
+        parts.append(f"Rating: {movie['Rate']:.1f}/10\n")
     else:
-        response += "Rating: Not available\n"
+        parts.append("Rating: Not available\n")
     
     # Add additional details if available
-    if 'Type' in movie and pd.notna(movie['Type']):
-        response += f"Type: {movie['Type']}\n"
+    if HAS_TYPE[idx]:
+        parts.append(f"Type: {movie['Type']}\n")
     
-    if 'Certificate' in movie and pd.notna(movie['Certificate']):
-        response += f"Certificate: {movie['Certificate']}\n"
+    if HAS_CERTIFICATE[idx]:
+        parts.append(f"Certificate: {movie['Certificate']}\n")
     
-    if 'Duration' in movie and pd.notna(movie['Duration']):
-        response += f"Duration: {movie['Duration']}\n"
+    if HAS_DURATION[idx]:
+        parts.append(f"Duration: {movie['Duration']}\n")
     
     # Add content warnings if available
-    content_warnings = []
-    if 'Violence' in movie and pd.notna(movie['Violence']) and movie['Violence']:
-        content_warnings.append(f"Violence: {movie['Violence']}")
-    if 'Frightening' in movie and pd.notna(movie['Frightening']) and movie['Frightening']:
-        content_warnings.append(f"Frightening: {movie['Frightening']}")
-    if 'Profanity' in movie and pd.notna(movie['Profanity']) and movie['Profanity']:
-        content_warnings.append(f"Profanity: {movie['Profanity']}")
-   
+    content_warnings = [
+        f"{column}: {WARNING_VALUES[column][idx]}"
+        for column, present in WARNING_PRESENT.items()
+        if present[idx] and WARNING_VALUES[column][idx]
+    ]
     
     if content_warnings:
-        response += "\nContent Warnings:\n"
-        response += "\n".join(content_warnings)
+        parts.append("\nContent Warnings:\n")
+        parts.append("\n".join(content_warnings))
         
-    response += "\n\nUse /random to get another random movie or /recommend to browse by genre."
+    parts.append("\n\nUse /random to get another random movie or /recommend to browse by genre.")
+    response = "".join(parts)
     
     await update.message.reply_text(response)
 
@@ -300,6 +256,10 @@ Movies are divided into RATED (with numeric ratings) and UNRATED (without rating
 """
     await update.message.reply_text(help_text)
 
+async def database_unavailable(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Reply to any command when the movie database couldn't be loaded."""
+    await update.message.reply_text("Sorry, I couldn't load the movie database. Please try again later.")
+
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel the conversation."""
     await update.message.reply_text('Operation cancelled. Use /start to begin again.')
@@ -307,26 +267,39 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 def main() -> None:
     """Start the bot."""
+    # Use the faster libuv-based event loop when available (uvloop doesn't support Windows).
+    # The policy is set directly because uvloop.install() is deprecated on newer Python versions.
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+    
     # Create the Application
     application = Application.builder().token("7192054190:AAFAV_IsvSmNBHhgWuh_TWeaTK3V5_jA4cE").build()
 
-    # Add conversation handler for recommendation flow
-    conv_handler = ConversationHandler(
-        entry_points=[CommandHandler("recommend", recommend_command)],
-        states={
-            CHOOSING_GENRE: [CallbackQueryHandler(genre_selected, pattern=r"^genre_")],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-    )
-    
-    application.add_handler(conv_handler)
-    
-    # Add command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("genres", genres_command))
-    application.add_handler(CommandHandler("popular", popular_command))
-    application.add_handler(CommandHandler("random", random_movie))
+    if movies_df.empty:
+        # The dataset is loaded once at startup, so without it every command gets the same reply
+        logger.error("Movie database is unavailable, only the fallback handler is registered")
+        application.add_handler(MessageHandler(filters.COMMAND, database_unavailable))
+    else:
+        # Add conversation handler for recommendation flow
+        conv_handler = ConversationHandler(
+            entry_points=[CommandHandler("recommend", recommend_command)],
+            states={
+                CHOOSING_GENRE: [CallbackQueryHandler(genre_selected, pattern=r"^genre_")],
+            },
+            fallbacks=[CommandHandler("cancel", cancel)],
+        )
+        
+        application.add_handler(conv_handler)
+        
+        # Add command handlers
+        application.add_handler(CommandHandler("start", start))
+        application.add_handler(CommandHandler("help", help_command))
+        application.add_handler(CommandHandler("genres", genres_command))
+        application.add_handler(CommandHandler("popular", popular_command))
+        application.add_handler(CommandHandler("random", random_movie))
     
     # Start the Bot
     application.run_polling()
@@ -0,0 +1,74 @@
+# test_dataset_handler.py
+import pandas as pd
+
+import dataset_handler
+
+CSV_HEADER = "Name,Date,Rate,Genre,Duration,Type,Certificate,Violence,Frightening,Profanity\n"
+
+def write_csv(path, rows):
+    path.write_text(CSV_HEADER + "".join(row + "\n" for row in rows))
+    return str(path)
+
+def test_process_dataset_with_null_category_column_in_first_chunk(tmp_path):
+    input_file = write_csv(tmp_path / "movies.csv", [
+        "First,2021,7.6,Drama,120,Film,R,,Mild,Mild",
+        "Second,2020,No Rate,\"Action, Drama\",90,Film,PG-13,Moderate,,Severe",
+        "Third,2019,8.1,Comedy,,Series,,Severe,Moderate,",
+    ])
+    output_file = str(tmp_path / "movies.parquet")
+
+    assert dataset_handler.process_dataset(input_file, output_file, chunksize=1)
+
+    df = pd.read_parquet(output_file)
+    assert df['Name'].tolist() == ['First', 'Second', 'Third']
+    assert df['Violence'].isna().tolist() == [True, False, False]
+    assert df['Violence'].iloc[1] == 'Moderate'
+    assert df['Rate'].isna().tolist() == [False, True, False]
+    assert not (tmp_path / "movies.parquet.tmp").exists()
+
+def test_process_dataset_removes_partial_file_on_failure(tmp_path, monkeypatch):
+    input_file = write_csv(tmp_path / "movies.csv", [
+        "First,2021,7.6,Drama,120,Film,R,Mild,Mild,Mild",
+        "Second,2020,6.1,Comedy,90,Film,PG-13,Moderate,Mild,Severe",
+    ])
+    output_file = str(tmp_path / "movies.parquet")
+
+    process_chunk = dataset_handler._process_chunk
+    calls = []
+
+    def failing_process_chunk(df):
+        calls.append(df)
+        if len(calls) > 1:
+            raise ValueError("broken chunk")
+        return process_chunk(df)
+
+    monkeypatch.setattr(dataset_handler, '_process_chunk', failing_process_chunk)
+
+    assert not dataset_handler.process_dataset(input_file, output_file, chunksize=1)
+    assert not (tmp_path / "movies.parquet").exists()
+    assert not (tmp_path / "movies.parquet.tmp").exists()
+
+def test_process_dataset_drops_rows_missing_required_columns(tmp_path, recwarn):
+    input_file = write_csv(tmp_path / "movies.csv", [
+        ",2021,7.6,Drama,120,Film,R,Mild,Mild,Mild",
+        "Second,2020,6.1,Comedy,90,Film,PG-13,Moderate,Mild,Severe",
+    ])
+    output_file = str(tmp_path / "movies.parquet")
+
+    assert dataset_handler.process_dataset(input_file, output_file)
+
+    assert pd.read_parquet(output_file)['Name'].tolist() == ['Second']
+    assert not [w for w in recwarn if issubclass(w.category, pd.errors.SettingWithCopyWarning)]
+
+def test_process_dataset_with_non_numeric_duration(tmp_path):
+    input_file = write_csv(tmp_path / "movies.csv", [
+        "First,2021,7.6,Drama,120 ,Film,R,Mild,Mild,Mild",
+        "Second,2020,6.1,Comedy,-,Film,PG-13,Moderate,Mild,Severe",
+    ])
+    output_file = str(tmp_path / "movies.parquet")
+
+    assert dataset_handler.process_dataset(input_file, output_file)
+
+    df = pd.read_parquet(output_file)
+    assert df['Duration'].iloc[0] == 120.0
+    assert pd.isna(df['Duration'].iloc[1])